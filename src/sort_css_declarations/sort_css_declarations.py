@@ -1,20 +1,102 @@
 import argparse
-import logging
+import codecs
+import functools
+import io
+import pathlib
 import re
-from typing import Any
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Deque
 from typing import Dict
 from typing import Generator
+from typing import Iterable
 from typing import List
+from typing import Set
+from typing import TextIO
 from typing import Tuple
-from typing import Union
 
-import bs4
-import cssutils  # type: ignore
+import regex  # type: ignore
+from lxml import etree  # type: ignore
 
-# To silence the warnings and error messages in stdout while using cssutils.parseString.
-# It's not informative, doesn't affect the funcionality
-# of the stylesheet and unnecessarly verbose.
-cssutils.log.setLevel(logging.CRITICAL)
+# lxml implies the <html> and <body> wrappers around partial templates, so
+# this is used to tell a full-fetched HTML page apart from a fragment.
+_HTML_TAG_BYTES: re.Pattern = re.compile(rb"<(html|body)[\s>]", re.IGNORECASE)
+
+# Size of the chunks the html is fed to the parser in.
+_CHUNK_SIZE: int = 64 * 1024
+
+
+def _compile_selector(pattern: str, flags: int = 0) -> regex.Pattern:
+    """Compiles a pattern of the CSS scanner wrapped in an atomic group.
+
+    Selectors like ":focus:hover" or "a::before", strings and comments are
+    easy to match with patterns that backtrack catastrophically on a
+    mismatch. Every regex matching the stylesheet has to be compiled with this
+    function and written with possessive quantifiers (*+, ++), so the engine
+    never gives back what it has already consumed and stays linear on any
+    input."""
+
+    return regex.compile(f"(?>{pattern})", flags)
+
+
+# Tokens of the CSS scanner. Comments and strings are matched as a whole, so
+# the braces and semicolons inside of them are not taken for syntax.
+_CSS_STRING: str = r""""(?:[^"\\]|\\.)*+"|'(?:[^'\\]|\\.)*+'"""
+_CSS_COMMENT: str = r"/\*.*?(?:\*/|\Z)"
+_CSS_TOKEN: regex.Pattern = _compile_selector(
+    rf"{_CSS_COMMENT}|{_CSS_STRING}|[{{}};]", regex.S
+)
+_BLOCK_TOKEN: regex.Pattern = _compile_selector(
+    rf"{_CSS_COMMENT}|{_CSS_STRING}|[{{}}]", regex.S
+)
+_DECLARATION: regex.Pattern = _compile_selector(
+    rf"(?:{_CSS_STRING}|\([^)]*+\)?+|[^;])++", regex.S
+)
+_AT_KEYWORD: regex.Pattern = _compile_selector(r"@[\w-]++")
+_COMMENT: regex.Pattern = _compile_selector(_CSS_COMMENT, regex.S)
+_WHITESPACE: regex.Pattern = _compile_selector(r"\s++")
+_CHARSET: re.Pattern = re.compile(rb'@charset "([^"]*)";')
+
+
+@dataclass(slots=True)
+class Entry:
+    """Record of a CSS selector in the css_dict: its preceding comment, the
+    declarations, the base selector ("head") and its "kind"."""
+
+    comment: str = ""
+    props: List[str] = field(default_factory=list)
+    head: str = ""
+    kind: str = "tag"
+
+
+def _head(css: str) -> str:
+    """Splits up the class, id or tag from the rest of the selector, e.g.
+    "div:hover", without a regex or any intermediate list."""
+
+    end: int = len(css)
+    space: int = css.find(" ")
+    colon: int = css.find(":")
+
+    if space != -1:
+        end = space
+    if colon != -1 and colon < end:
+        end = colon
+
+    return css[:end].strip()
+
+
+def _kind(selector: str) -> str:
+    "Tells whether the selector starts with an id, a class or a tag."
+
+    if selector.startswith("#"):
+        return "id"
+    if selector.startswith("."):
+        return "class"
+
+    return "tag"
 
 
 def read_file(path: str) -> str:
@@ -25,319 +107,434 @@ def read_file(path: str) -> str:
     return css_content
 
 
-def recurse(
-    html_groups: Union[bs4.BeautifulSoup, Any], collector_dict: Dict[Any, Any]
-) -> Dict[str, List[str | Dict[str, Any]] | Dict[str, str | List[Any]]]:
-    "Recursively iterates the BeautifulSoup4.html_parse return."
+def read_bytes(path: str) -> bytes:
+    "Reads the raw content of the file, leaving the decoding to the parsers."
+    return pathlib.Path(path).read_bytes()
+
 
-    for group in html_groups:
+def _decode_css(css_content: bytes) -> str:
+    """Decodes the stylesheet with the encoding declared by its @charset
+    rule, otherwise as UTF-8."""
 
-        # MyPy cannot resolve properly the bs4 annotations.
-        # "Re-cast" it as bs4.element.Tag solves complains
-        # for the rest of the func.
-        element: bs4.element.Tag = group  # type: ignore
+    if css_content.startswith(codecs.BOM_UTF8):
+        return css_content[len(codecs.BOM_UTF8) :].decode("UTF-8")
 
-        if not isinstance(group, str):
+    charset: re.Match | None = _CHARSET.match(css_content)
+
+    if charset is not None:
+        try:
+            return css_content.decode(charset.group(1).decode("ascii"))
+        except (LookupError, UnicodeDecodeError):
+            pass
 
-            if not element.name in collector_dict:
-                collector_dict[element.name] = []
+    return css_content.decode("UTF-8")
 
-            tmp_collector: dict[str, Any] = {}
 
-            if element.attrs:
-                tmp_collector = {"attributes": element.attrs}
+class _IdentifierTarget:
+    """Parser target of lxml.etree.HTMLParser collecting the tags, IDs and
+    class names from the start events. No tree is built, so the nesting of
+    the html has no depth limit."""
 
-            collector_dict[element.name] += (recurse(group, tmp_collector),)
+    def __init__(self, full_page: bool) -> None:
+        self.identifiers: Deque[str] = deque()
+        self.full_page: bool = full_page
+        self.in_body: bool = not full_page
 
-    return collector_dict
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
 
+        if not self.in_body:
+            if tag != "body":
+                return
+            self.in_body = True
 
-def _parse(
-    html_string: str,
-) -> Dict[str, List[str | Dict[str, Any]] | Dict[str, str | List[Any]]]:
-    """Recursively parses the html_groups from BeautifulSoup4.html_parse and
-    fetches to a hierarchical dictionary."""
+        elif not self.full_page and tag in ("html", "head", "body"):
+            return
 
-    soup: bs4.BeautifulSoup = bs4.BeautifulSoup(html_string, "html.parser")
+        self.identifiers.append(tag)
 
-    child_ls: list[bs4.PageElement] = [child for child in soup.contents]
+        element_id: str | None = attrib.get("id")
+        if element_id is not None:
+            self.identifiers.append(f"#{element_id}")
 
-    return recurse(child_ls, {})
+        for class_name in attrib.get("class", "").split():
+            self.identifiers.append(f".{class_name}")
 
+    def close(self) -> None:
+        return None
 
-def convert_html_to_dict(
-    path: str,
-) -> Dict[str, List[Any] | Any]:
-    "Converts html to dictionary calling on _parse function."
-    return _parse(read_file(path))
 
+def iter_identifiers(path: str) -> Generator[str, None, None]:
+    """Feeds the html to lxml.etree.HTMLParser in chunks and yields all the
+    tags, IDs and class names in the same order as in the html tree.
+    Full-fetched pages are yielded starting from the body tag."""
 
-def get_identifiers_in_order(
-    html_dict: List[Dict[str, List[Any]]] | Dict[str, List[Any]]
-) -> Generator[str, None, None]:
-    """Starting from the body tag, recurses the html tree, and yield all the
-    tags, IDs and class names."""
+    with open(path, "rb") as file:
+        html_bytes: bytes = file.read()
 
-    start_node: List[Dict[str, List[Any]]] | Dict[str, List[Any]] = html_dict
+    # An empty document has no elements, and lxml refuses to close it.
+    if not html_bytes.strip():
+        return
 
-    if isinstance(html_dict, list):
-        if "body" in html_dict[0]:
-            yield "body"
-            start_node = html_dict[0]["body"]
+    # lxml always implies the <html> and <body> wrappers, so a partial HTML
+    # has to be recognised from the source itself.
+    target = _IdentifierTarget(_HTML_TAG_BYTES.search(html_bytes) is not None)
+    parser = etree.HTMLParser(target=target)
+    identifiers: Deque[str] = target.identifiers
 
-    # Could be reduced with some smart move, but don't bother doing it. The
-    # more explicit is, the easier is to debug.
-    # ======================================================================
-    if isinstance(start_node, list):
-        for dictionary in start_node:
-            for key, value in dictionary.items():
+    for start in range(0, len(html_bytes), _CHUNK_SIZE):
+        parser.feed(html_bytes[start : start + _CHUNK_SIZE])
 
-                if key == "attributes":
-                    if "id" in value:
-                        yield f"#{value['id']}"  # type: ignore
-                    if "class" in value:
-                        for class_name in value["class"]:  # type: ignore
-                            yield f".{class_name}"
+        while identifiers:
+            yield identifiers.popleft()
 
-                if key != "attributes":
-                    yield key
+    parser.close()
 
-                if isinstance(value, list):
-                    yield from get_identifiers_in_order(value)
+    while identifiers:
+        yield identifiers.popleft()
 
-    elif isinstance(start_node, dict):
-        for key, value in start_node.items():
 
-            if key == "attributes":
-                if "id" in value:
-                    yield f"#{value['id']}"  # type: ignore
-                if "class" in value:
-                    for class_name in value["class"]:  # type: ignore
-                        yield f".{class_name}"
+def _unique(identifiers: Iterable[str]) -> Generator[str, None, None]:
+    "Yields the identifiers skipping the ones already seen."
 
-            if key != "attributes":
-                yield key
+    seen: Set[str] = set()
+    add = seen.add
 
-            if isinstance(value, list):
-                yield from get_identifiers_in_order(value)
-    # ======================================================================
+    for identifier in identifiers:
+        if identifier not in seen:
+            add(identifier)
+            yield identifier
 
 
 def get_html_element_order(path: str) -> Tuple[str, ...]:
-    """Runs all the parsing and recursing functions, then returns the
-    identifiers in the same order as in the html tree."""
+    """Streams the identifiers of the html, then returns them in the same
+    order as in the html tree without duplicates."""
 
-    html_dict: Dict[str, List[Any] | Any] = convert_html_to_dict(path)
+    identifiers_in_order: Generator[str, None, None] = iter_identifiers(path)
 
-    identifiers_in_order: Generator[str, None, None]
+    identifiers_without_dups: Tuple[str, ...] = tuple(_unique(identifiers_in_order))
 
-    try:
-        identifiers_in_order = get_identifiers_in_order(html_dict["html"])
+    return identifiers_without_dups
 
-    # If KeyError occurs, that means, that the HTML is only partial, not a
-    # full-fetched HTML page.
-    except KeyError:
-        identifiers_in_order = get_identifiers_in_order(html_dict)
 
-    identifiers_without_dups: Tuple[str, ...] = tuple(
-        dict.fromkeys(identifiers_in_order)
-    )
+def _clean_prelude(prelude: str) -> str:
+    "Removes the comments and collapses the whitespaces of a selector."
+    return _WHITESPACE.sub(" ", _COMMENT.sub("", prelude)).strip()
 
-    return identifiers_without_dups
 
+def _block_end(css_content: str, start: int) -> int:
+    "Returns the index of the closing brace of the block opened at start."
 
-def css_to_dict(css_content: str) -> dict[str, dict[str, str]]:
-    "Reads, parses, converts CSS to dictionary."
+    depth: int = 0
 
-    css_dict: dict[str, dict[str, str]] = {}
-    sheet: cssutils.css.cssstylesheet.CSSStyleSheet = cssutils.parseString(css_content)
+    for match in _BLOCK_TOKEN.finditer(css_content, start):
+        token: str = match.group()
 
-    comment = ""
+        if token == "{":
+            depth += 1
+        elif token == "}":
+            depth -= 1
 
-    for rule in sheet.cssRules:
+            if depth == 0:
+                return match.start()
 
-        if type(rule) == cssutils.css.csscomment.CSSComment:
-            comment = rule.cssText
-        elif type(rule) == cssutils.css.CSSMediaRule:
-            # The media queries will be processed in the media_rules_to_dict function.
-            pass
+    return len(css_content)
 
-        elif type(rule) == cssutils.css.CSSImportRule:
 
-            if "/*IMPORTS*/" not in css_dict.keys():
-                css_dict.setdefault("/*IMPORTS*/", {"comment": "", "props": ""})
+def _split_declarations(block: str) -> List[str]:
+    """Splits the content of a declaration block into a list of
+    "property: value" strings."""
 
-            css_dict["/*IMPORTS*/"]["comment"] = ""
-            css_dict["/*IMPORTS*/"]["props"] += f"{rule.cssText}\n"
-        else:
-            if rule.selectorText not in css_dict.keys():
-                css_dict.setdefault(rule.selectorText, {"comment": "", "props": ""})
+    declarations: List[str] = []
+
+    for declaration in _DECLARATION.findall(_COMMENT.sub("", block)):
+        name, _, value = declaration.partition(":")
+        name = name.strip()
+        value = _WHITESPACE.sub(" ", value).strip()
 
-            css_dict[rule.selectorText]["comment"] = comment
-            css_dict[rule.selectorText]["props"] = rule.style.cssText
+        if name and value:
+            declarations.append(f"{name}: {value}")
 
+    return declarations
+
+
+def _scan_css(css_content: str) -> Generator[Tuple[str, str | None, str], None, None]:
+    """Walks through the css_content once and yields the (selector_text,
+    props_text, comment) of the top-level rules. The statement at-rules,
+    like @import, are yielded with None as the props_text. The comment is the
+    last comment preceding the rule."""
+
+    comment: str = ""
+    start: int = 0
+    pos: int = 0
+
+    while True:
+        match = _CSS_TOKEN.search(css_content, pos)
+
+        if match is None:
+            break
+
+        token: str = match.group()
+        pos = match.end()
+
+        if token.startswith("/*"):
+            # Only the comments between the rules are kept.
+            if not css_content[start : match.start()].strip():
+                comment = token
+                start = pos
+
+        elif token == ";":
+            yield _clean_prelude(css_content[start : match.start()]), None, comment
             comment = ""
+            start = pos
 
-    return css_dict
+        elif token == "{":
+            end: int = _block_end(css_content, match.start())
+            selector_text: str = _clean_prelude(css_content[start : match.start()])
+            yield selector_text, css_content[pos:end], comment
+            comment = ""
+            start = pos = end + 1
 
+        elif token == "}":
+            # Stray closing brace, nothing to close.
+            start = pos
 
-def format_css_dict(
-    css_dict: dict[str, dict[str, str]]
-) -> dict[str, dict[str, str | list[str]]]:
-    "Separates the string dump of properties into a list[str]."
 
-    formated_css_dict: dict[str, dict[str, str | list[str]]] = {}
+def css_to_dict(css_content: str | bytes) -> Dict[str, Entry]:
+    """Scans, converts CSS to dictionary. The grouped selectors are separated
+    and the properties are collected into a sorted list[str]. Each entry also
+    keeps the base selector ("head") and its "kind" for the sorting."""
 
-    for selectors, values in css_dict.items():
+    if isinstance(css_content, bytes):
+        css_content = _decode_css(css_content)
 
-        split_properties: list[str] = re.split(";", values["props"])
-        split_properties = [prop.replace("\n", "").strip() for prop in split_properties]
+    formated_css_dict: Dict[str, Entry] = {}
 
-        if selectors == "/*IMPORTS*/":
+    # The last (selectors, comment, props) of each selector_text. A repeated
+    # selector_text replaces the earlier rule, like in the cascade, only the
+    # comma-split groups are merged.
+    rules: Dict[str, Tuple[List[str], str, List[str]]] = {}
 
-            if "/*IMPORTS*/" not in formated_css_dict:
-                imports: List[str] = [
-                    prop.strip(";") for prop in values["props"].split("\n")
-                ]
-                formated_css_dict.setdefault(
-                    "/*IMPORTS*/", {"comment": values["comment"], "props": imports}
-                )
+    comment = ""
 
-        else:
+    for selector_text, props_text, rule_comment in _scan_css(css_content):
+
+        if rule_comment:
+            comment = rule_comment
+
+        if not selector_text:
+            continue
+
+        at_keyword: regex.Match | None = _AT_KEYWORD.match(selector_text)
 
-            for selector in selectors.split(","):
+        if at_keyword is None:
+            if props_text is None:
+                continue
 
-                selector = selector.strip()
+            selectors: List[str] = [
+                selector.strip() for selector in selector_text.split(",")
+            ]
 
+            # The entries are created at the first occurrence, so they keep
+            # the order of the stylesheet.
+            for selector in selectors:
                 if selector not in formated_css_dict:
-                    formated_css_dict.setdefault(
-                        selector,
-                        {"comment": values["comment"], "props": split_properties},
+                    formated_css_dict[selector] = Entry(
+                        head=_head(selector), kind=_kind(selector)
                     )
 
-                else:
-                    formated_css_dict[selector]["comment"] += values["comment"]  # type: ignore
-                    formated_css_dict[selector]["props"] = [
-                        *formated_css_dict[selector]["props"],
-                        *split_properties,
-                    ]
+            rules[selector_text] = (
+                selectors,
+                comment,
+                _split_declarations(props_text),
+            )
 
-    return {
-        key: {"comment": value["comment"], "props": sorted(value["props"])}
-        for key, value in formated_css_dict.items()
-    }
+            comment = ""
+
+        elif at_keyword.group().lower() == "@media":
+            # The media queries will be processed in the media_rules_to_dict function.
+            pass
+
+        elif at_keyword.group().lower() == "@import":
+            if "/*IMPORTS*/" not in formated_css_dict:
+                formated_css_dict["/*IMPORTS*/"] = Entry(
+                    head="/*IMPORTS*/", kind="import"
+                )
 
+            formated_css_dict["/*IMPORTS*/"].props.append(selector_text)
+
+        elif at_keyword.group().lower() != "@charset":
+            # Any other at-rule, like @font-face or @keyframes, is passed
+            # through as it is written.
+            at_rule: str = (
+                f"{selector_text};"
+                if props_text is None
+                else f"{selector_text} {{{props_text}}}"
+            )
+
+            if at_rule not in formated_css_dict:
+                formated_css_dict[at_rule] = Entry(
+                    comment=comment, head=at_keyword.group(), kind="at-rule"
+                )
 
-def sort_css_by_keys(
-    css_dict: Dict[str, Dict[str, str | List[str]]]
-) -> Dict[str, Dict[str, str | List[str]]]:
+            comment = ""
+
+    for selectors, selectors_comment, split_properties in rules.values():
+        for selector in selectors:
+            entry: Entry = formated_css_dict[selector]
+            entry.comment += selectors_comment
+            entry.props.extend(split_properties)
+
+    for entry in formated_css_dict.values():
+        entry.props.sort()
+
+    return formated_css_dict
+
+
+def sort_css_by_keys(css_dict: Dict[str, Entry]) -> Dict[str, Entry]:
     """Orders the tags alphabetically, then ids, classes alphabetically.
-    Return both as a merged dictionary."""
+    Return both as a merged dictionary, after the imports and the at-rules."""
 
-    imports: Dict[str, Dict[str, str | List[str]]] = {
-        key: css_dict[key] for key in sorted(css_dict) if key == "/*IMPORTS*/"
-    }
+    imports: Dict[str, Entry] = {}
+    tags: Dict[str, Entry] = {}
+    ids_classes: Dict[str, Entry] = {}
 
-    tags: Dict[str, Dict[str, str | List[str]]] = {
-        key: css_dict[key] for key in sorted(css_dict) if not key.startswith((".", "#"))
-    }
-    ids_classes: Dict[str, Dict[str, str | List[str]]] = {
-        key: css_dict[key] for key in sorted(css_dict) if key.startswith((".", "#"))
+    # The order of the at-rules can matter, e.g. @namespace or @layer, so
+    # they keep the order of the stylesheet.
+    at_rules: Dict[str, Entry] = {
+        key: value for key, value in css_dict.items() if value.kind == "at-rule"
     }
 
-    return {**imports, **tags, **ids_classes}
+    for key in sorted(css_dict):
+        kind: str = css_dict[key].kind
+
+        if kind == "import":
+            imports[key] = css_dict[key]
+        elif kind == "at-rule":
+            continue
+        elif kind == "tag":
+            tags[key] = css_dict[key]
+        else:
+            ids_classes[key] = css_dict[key]
+
+    return imports | at_rules | tags | ids_classes
 
 
 def sort_css_by_html(
-    css_dict: Dict[str, Dict[str, Any]], html_element_order: Tuple[str, ...]
-) -> Dict[str, Dict[str, str | List[str]]]:
+    css_dict: Dict[str, Entry], html_element_order: Tuple[str, ...]
+) -> Dict[str, Entry]:
     """Loops through the html_element_order identifiers, and return the
     key-value from css_dict in the order of the identifiers."""
 
-    result: Dict[str, Dict[str, str | List[str]]] = {}
-
-    for html_elem in html_element_order:
-        for css, value in css_dict.items():
+    result: Dict[str, Entry] = {}
 
-            base_selector: str = list(filter(None, re.split(" |:", css)))[0].strip()
-
-            if (
-                # Split up the class or id from any selectors.
-                base_selector == html_elem
-                or base_selector == "html"
-                or css.startswith((":", "*"))
-                and css not in result
-            ):
-                result[css] = value
-
-    return result
+    # Index the selectors by their base selector once, so every identifier
+    # is a single lookup instead of a scan through the whole css_dict.
+    base_selectors: Dict[str, str] = {}
+    index: Dict[str, List[Tuple[str, Entry]]] = {}
 
+    for css, value in css_dict.items():
 
-def media_rules_to_dict(
-    css_content: str,
-) -> Dict[str, List[Dict[str, str | List[str]]]]:
-    """Reads, parses the css_content, searches for media query declarations,
-    then converts them to dictionary."""
+        # The class or id split up from the selector by css_to_dict.
+        base_selector: str = value.head
 
-    # cssutils has poor documentation about how to get the @media specification
-    # only, show this issue has been solved by regex for now.
-    media_rule_token: re.Pattern = re.compile(r"(@media.*){")
+        # The "html", ":", "*" selectors and the at-rules match any of the
+        # identifiers.
+        if (
+            base_selector == "html"
+            or css.startswith((":", "*"))
+            or value.kind == "at-rule"
+        ):
+            base_selector = "*"
 
-    sheet: cssutils.css.cssstylesheet.CSSStyleSheet = cssutils.parseString(css_content)
+        base_selectors[css] = base_selector
+        index.setdefault(base_selector, []).append((css, value))
 
-    # Get all the media queries from the object blob.
-    media_queries: List[cssutils.css.cssmediarule.CSSMediaRule] = [
-        x for x in sheet if isinstance(x, cssutils.css.cssmediarule.CSSMediaRule)
-    ]
+    html_elems = iter(html_element_order)
+    first_elem: str | None = next(html_elems, None)
 
-    # Init the "collectors".
-    media_rules_dict: Dict[str, List[Dict[str, str | List[str]]]] = {}
-    comment: str = ""
+    if first_elem is None:
+        return result
 
-    for m_query in media_queries:
-        media_rule: str = re.findall(media_rule_token, m_query.cssText)[0]
+    # The first identifier takes the "match any" selectors too, in the same
+    # order as they are in css_dict.
+    for css, value in css_dict.items():
+        if base_selectors[css] in (first_elem, "*"):
+            result[css] = value
 
-        if media_rule not in media_rules_dict.keys():
-            media_rules_dict.setdefault(media_rule, [])
+    target: int = len(css_dict)
 
-        for css_rule in m_query:
+    for html_elem in html_elems:
 
-            if type(css_rule) == cssutils.css.csscomment.CSSComment:
-                comment = css_rule.cssText
+        # Every selector is placed, the rest of the identifiers can't add more.
+        if len(result) == target:
+            break
 
-            elif type(css_rule) == cssutils.css.CSSStyleRule:
+        for css, value in index.get(html_elem, ()):
+            if css not in result:
+                result[css] = value
 
-                props_ls: List[str] = list(
-                    map(lambda x: x.strip(";"), css_rule.style.cssText.split("\n"))
-                )
+    return result
 
-                tmp: Dict[str, str | List[str]] = {}
-                tmp["css_selector"] = css_rule.selectorText
-                tmp["comment"] = comment
-                tmp["props"] = props_ls
 
-                media_rules_dict[media_rule].append(tmp)
+def media_rules_to_dict(
+    css_content: str | bytes,
+) -> Dict[str, List[Dict[str, str | List[str]]]]:
+    """Scans the css_content, searches for media query declarations, then
+    converts them to dictionary."""
 
-                # Reset the "comment collector"
-                comment = ""
+    if isinstance(css_content, bytes):
+        css_content = _decode_css(css_content)
 
-    result: Dict[str, List[Dict[str, str | List[str]]]] = {}
+    media_rules_dict: Dict[str, List[Dict[str, str | List[str]]]] = {}
 
-    for key, value in media_rules_dict.items():
+    for media_rule, media_block, _ in _scan_css(css_content):
+
+        at_keyword: regex.Match | None = _AT_KEYWORD.match(media_rule)
+
+        if (
+            media_block is None
+            or at_keyword is None
+            or at_keyword.group().lower() != "@media"
+        ):
+            continue
+
+        selector_dicts = media_rules_dict.setdefault(media_rule, [])
+
+        for css_selector, props_text, comment in _scan_css(media_block):
+
+            if not css_selector:
+                continue
+
+            # A nested at-rule, like @supports, is passed through as it is
+            # written, the same as in css_to_dict.
+            if _AT_KEYWORD.match(css_selector) is not None:
+                selector_dicts.append(
+                    {
+                        "css_selector": (
+                            f"{css_selector};"
+                            if props_text is None
+                            else f"{css_selector} {{{props_text}}}"
+                        ),
+                        "comment": comment,
+                        "props": [],
+                        "kind": "at-rule",
+                    }
+                )
+                continue
 
-        if key not in result.keys():
-            result.setdefault(key, [])
+            if props_text is None:
+                continue
 
-        for selector_dict in value:
-            result[key].append(
+            selector_dicts.append(
                 {
-                    "css_selector": selector_dict["css_selector"],
-                    "comment": selector_dict["comment"],
-                    "props": sorted(selector_dict["props"]),
+                    "css_selector": css_selector,
+                    "comment": comment,
+                    "props": sorted(_split_declarations(props_text)),
+                    "kind": _kind(css_selector),
                 }
             )
 
-    return result
+    return media_rules_dict
 
 
 def sort_media_queries_by_html(
@@ -355,13 +552,14 @@ def sort_media_queries_by_html(
 
             for selector_dict in dict_ls:
 
-                base_selector: str = list(filter(None, re.split(" |:", selector_dict["css_selector"])))[0].strip()  # type: ignore
+                base_selector: str = _head(selector_dict["css_selector"])  # type: ignore
 
                 if (
                     # Split up the class or id from any selectors.
                     base_selector == html_elem
                     or base_selector == "html"
                     or selector_dict["css_selector"].startswith((":", "*"))  # type: ignore
+                    or selector_dict["kind"] == "at-rule"
                     and media not in result
                 ):
                     result[media] = dict_ls
@@ -369,59 +567,142 @@ def sort_media_queries_by_html(
     return result
 
 
-def generate_output_str(
-    css_dict: Dict[str, Dict[str, str | List[str]]],
+def write_css(
+    css_dict: Dict[str, Entry],
     sorted_media_queries: Dict[str, List[Dict[str, str | List[str]]]],
-) -> str:
-    """Loops through the CSS and media query dictionary, then returns the content
-    as a formated string."""
+    out: TextIO,
+) -> None:
+    """Loops through the CSS and media query dictionary, then writes the content
+    as formated chunks to the out file-like object."""
 
-    result_str: str = ""
+    write = out.write
 
     for key, value in css_dict.items():
 
-        if value["comment"]:
-            result_str += f"\n{value['comment']}\n"
+        if value.comment:
+            write(f"\n{value.comment}\n")
         else:
-            result_str += "\n"
+            write("\n")
 
         # If they are import declarations..
         if key == "/*IMPORTS*/":
-            result_str += f'{key}\n'
+            write(f"{key}\n")
+
+            for prop in value.props:
+                if prop:
+                    write(f"{prop};\n")
 
-            for prop in list(filter(None, value["props"])):
-                result_str += f"{prop};\n"
+        # If they are passed through at-rules.
+        elif value.kind == "at-rule":
+            write(f"{key}\n")
 
         # If they are normal CSS rules.
         else:
-            result_str += f"{key} {{\n"
+            write(f"{key} {{\n")
 
-            for prop in value["props"]:
-                result_str += f"    {prop};\n"
+            for prop in value.props:
+                write(f"    {prop};\n")
 
-        if key != "/*IMPORTS*/":
-            result_str += "}\n"
+            write("}\n")
 
-    for key, value in sorted_media_queries.items():  # type: ignore
-        result_str += f"\n{key} {{"
+    for media, selector_dicts in sorted_media_queries.items():
+        write(f"\n{media} {{")
 
-        for selector_dict in value:
+        for selector_dict in selector_dicts:
 
-            if selector_dict["comment"]:  # type: ignore
-                result_str += f"\n    {selector_dict['comment']}\n"  # type: ignore
+            if selector_dict["comment"]:
+                write(f"\n    {selector_dict['comment']}\n")
             else:
-                result_str += "\n"
+                write("\n")
 
-            result_str += f'    {selector_dict["css_selector"]} {{\n'  # type: ignore
+            # If it is a passed through at-rule.
+            if selector_dict["kind"] == "at-rule":
+                write(f'    {selector_dict["css_selector"]}\n')
+                continue
 
-            for prop in selector_dict["props"]:  # type: ignore
-                result_str += f"        {prop};\n"
+            write(f'    {selector_dict["css_selector"]} {{\n')
 
-            result_str += "    }\n"
+            for prop in selector_dict["props"]:
+                write(f"        {prop};\n")
 
-        result_str += "}\n"
+            write("    }\n")
+
+        write("}\n")
+
+
+def generate_output_str(
+    css_dict: Dict[str, Entry],
+    sorted_media_queries: Dict[str, List[Dict[str, str | List[str]]]],
+) -> str:
+    """Loops through the CSS and media query dictionary, then returns the content
+    as a formated string."""
 
-    return result_str
+    output = io.StringIO()
+    write_css(css_dict, sorted_media_queries, output)
+
+    return output.getvalue()
+
+
+def _sort_file(
+    file_path: str, ordered_html_elems: Tuple[str, ...] | None
+) -> Tuple[Dict[str, Entry], Dict[str, List[Dict[str, str | List[str]]]]]:
+    """Sorts the CSS file of file_path, by the ordered_html_elems if they are
+    given, and returns the sorted rules and media queries."""
+
+    # Decoded once, for both of the scans.
+    css_content: str = _decode_css(read_bytes(file_path))
+
+    formated_css_dict: Dict[str, Entry] = css_to_dict(css_content)
+
+    media_rules_dict: Dict[
+        str, List[Dict[str, str | List[str]]]
+    ] = media_rules_to_dict(css_content)
+
+    # Evaluates if --by_html is used and generates the formated
+    # dictionaries correspondingly.
+    # ===============================
+    sorted_css: Dict[str, Entry]
+    sorted_media_queries: Dict[str, List[Dict[str, str | List[str]]]]
+
+    if ordered_html_elems is not None:
+        sorted_css = sort_css_by_html(formated_css_dict, ordered_html_elems)
+        sorted_media_queries = sort_media_queries_by_html(
+            media_rules_dict, ordered_html_elems
+        )
+
+    else:
+        sorted_css = sort_css_by_keys(formated_css_dict)
+        sorted_media_queries = media_rules_dict
+    # ===============================
+
+    return sorted_css, sorted_media_queries
+
+
+def _process_one(
+    file_path: str, ordered_html_elems: Tuple[str, ...] | None, in_place: bool
+) -> Tuple[str, str | None]:
+    """Sorts the CSS file of file_path. In-place the file is rewritten and
+    None is returned as output, otherwise the formated output string."""
+
+    sorted_css, sorted_media_queries = _sort_file(file_path, ordered_html_elems)
+
+    if in_place:
+        with open(file_path, "w", encoding="UTF-8") as file:
+            write_css(sorted_css, sorted_media_queries, file)
+
+        return file_path, None
+
+    return file_path, generate_output_str(sorted_css, sorted_media_queries)
+
+
+def _report(results: Iterable[Tuple[str, str | None]]) -> None:
+    "Prints the outputs of _process_one in the order of the files."
+
+    for file_path, css_output in results:
+        if css_output is None:
+            print(f"{file_path} formated successfully!")
+        else:
+            print(css_output)
 
 
 def main() -> None:
@@ -457,48 +738,28 @@ def main() -> None:
     by_html: str = args.by_html
     in_place: bool = args.in_place
 
-    for file_path in filenames:
-        css_content: str = read_file(file_path)
-
-        css_dict: Dict[str, Dict[str, str]] = css_to_dict(css_content)
-
-        formated_css_dict: Dict[str, Dict[str, str | List[str]]] = format_css_dict(
-            css_dict
-        )
-
-        media_rules_dict: Dict[
-            str, List[Dict[str, str | List[str]]]
-        ] = media_rules_to_dict(css_content)
-
-        # Evaluates if --by_html is used and generates the formated
-        # dictionaries correspondingly.
-        # ===============================
-        sorted_css: Dict[str, Dict[str, str | List[str]]]
-        sorted_media_queries: Dict[str, List[Dict[str, str | List[str]]]]
-
-        if by_html:
-            ordered_html_elems: Tuple[str, ...] = get_html_element_order(by_html)
+    # The html is the same for all the files, so it's parsed only once.
+    ordered_html_elems: Tuple[str, ...] | None = (
+        get_html_element_order(by_html) if by_html else None
+    )
 
-            sorted_css = sort_css_by_html(formated_css_dict, ordered_html_elems)
-            sorted_media_queries = sort_media_queries_by_html(
-                media_rules_dict, ordered_html_elems
-            )
+    process = functools.partial(
+        _process_one, ordered_html_elems=ordered_html_elems, in_place=in_place
+    )
 
-        else:
-            sorted_css = sort_css_by_keys(formated_css_dict)
-            sorted_media_queries = media_rules_dict
-        # ===============================
+    # The files are independent from each other, so more of them are sorted
+    # in parallel. A single file is not worth the start-up of the workers.
+    if len(filenames) > 1:
+        with ProcessPoolExecutor() as executor:
+            _report(executor.map(process, filenames))
 
-        css_output: str = generate_output_str(sorted_css, sorted_media_queries)
+    # In-process the output is streamed to stdout, without building it up.
+    elif filenames and not in_place:
+        write_css(*_sort_file(filenames[0], ordered_html_elems), sys.stdout)
+        print()
 
-        # ===============================
-        if in_place:
-            with open(file_path, "w", encoding="UTF-8") as file:
-                file.write(css_output)
-                print(f"{file_path} formated successfully!")
-        else:
-            print(css_output)
-        # ===============================
+    else:
+        _report(map(process, filenames))
 
 
 if __name__ == "__main__":
@@ -1,227 +1,62 @@
-EXPECTED_HTML_DICT = {
-    "html": [
-        {
-            "attributes": {"lang": "en"},
-            "head": [
-                {
-                    "meta": [
-                        {"attributes": {"charset": "UTF-8"}},
-                        {
-                            "attributes": {
-                                "http-equiv": "X-UA-Compatible",
-                                "content": "IE=edge",
-                            }
-                        },
-                        {
-                            "attributes": {
-                                "name": "viewport",
-                                "content": "width=device-width, initial-scale=1.0",
-                            }
-                        },
-                    ],
-                    "link": [
-                        {
-                            "attributes": {
-                                "rel": ["stylesheet"],
-                                "href": "./css/style.css",
-                            }
-                        }
-                    ],
-                    "title": [{}],
-                }
-            ],
-            "body": [
-                {
-                    "div": [
-                        {
-                            "attributes": {"class": ["banner-container"]},
-                            "h3": [{"u": [{}]}],
-                        },
-                        {
-                            "attributes": {"class": ["form-container"]},
-                            "div": [
-                                {
-                                    "attributes": {"class": ["form-wrapper"]},
-                                    "form": [
-                                        {
-                                            "attributes": {
-                                                "action": "index.php",
-                                                "method": "post",
-                                                "enctype": "multipart/form-data",
-                                            },
-                                            "div": [
-                                                {
-                                                    "attributes": {
-                                                        "class": ["upload-field"]
-                                                    },
-                                                    "label": [
-                                                        {
-                                                            "attributes": {
-                                                                "for": "file"
-                                                            },
-                                                            "u": [{}],
-                                                        }
-                                                    ],
-                                                    "input": [
-                                                        {
-                                                            "attributes": {
-                                                                "type": "file",
-                                                                "name": "file",
-                                                            }
-                                                        }
-                                                    ],
-                                                },
-                                                {
-                                                    "attributes": {
-                                                        "class": ["submit-wrapper"]
-                                                    },
-                                                    "button": [
-                                                        {
-                                                            "attributes": {
-                                                                "class": ["button"],
-                                                                "type": "submit",
-                                                                "name": "upload",
-                                                            }
-                                                        }
-                                                    ],
-                                                },
-                                            ],
-                                        }
-                                    ],
-                                }
-                            ],
-                        },
-                        {
-                            "attributes": {
-                                "id": "test_id",
-                                "class": ["output-container"],
-                            },
-                            "div": [
-                                {
-                                    "attributes": {"class": ["output-wrapper"]},
-                                    "p": [{"attributes": {"class": ["main-header"]}}],
-                                }
-                            ],
-                        },
-                    ]
-                }
-            ],
-        }
-    ]
-}
-
-
-EXPECTED_INCOMPLETE_HTML_DICT = {
-    "div": [{"attributes": {"class": ["banner-container"]}, "h3": [{"u": [{}]}]}]
-}
+from sort_css_declarations import Entry
 
-EXPECTED_HTML_ELEMS_ORDER = (
+EXPECTED_ORDERED_HTML_ELEMS = (
     "body",
     "div",
     ".banner-container",
     "h3",
     "u",
     ".form-container",
-    "div",
     ".form-wrapper",
     "form",
-    "div",
     ".upload-field",
     "label",
-    "u",
     "input",
     ".submit-wrapper",
     "button",
     ".button",
     "#test_id",
     ".output-container",
-    "div",
     ".output-wrapper",
     "p",
     ".main-header",
 )
 
-EXPECTED_INCOMPLETE_HTML_ELEMS_ORDER = ("div", ".banner-container", "h3", "u")
-
+EXPECTED_ORDERED_INCOMPLETE_HTML_ELEMS = ("div", ".banner-container", "h3", "u")
 
-EXPECTED_ORDERED_HTML_ELEMS = (
+EXPECTED_ORDERED_BODY_ATTRS_HTML_ELEMS = (
     "body",
+    "#top",
+    ".page",
     "div",
     ".banner-container",
     "h3",
     "u",
-    ".form-container",
-    ".form-wrapper",
-    "form",
-    ".upload-field",
-    "label",
-    "input",
-    ".submit-wrapper",
-    "button",
-    ".button",
-    "#test_id",
-    ".output-container",
-    ".output-wrapper",
-    "p",
-    ".main-header",
 )
 
-EXPECTED_ORDERED_INCOMPLETE_HTML_ELEMS = ("div", ".banner-container", "h3", "u")
-
-EXPECTED_CSS_DICT = {
-    ".banner-container": {
-        "comment": "",
-        "props": "align-items: center;\nbackground: #BEBEBE;\ndisplay: flex;\njustify-content: center",
-    },
-    ".form-container": {
-        "comment": "",
-        "props": "align-items: center;\ndisplay: flex;\njustify-content: center",
-    },
-    ".form-wrapper": {
-        "comment": "",
-        "props": "align-items: center;\nbackground: linear-gradient(90deg, rgba(218, 226, 218, 1) 26%, rgba(199, 199, 209, 1) 100%, rgba(0, 255, 23, 1) 100%);\nbackground: rgb(218, 226, 218);\nborder-radius: 5px;\nborder: 1px solid black;\ndisplay: flex;\njustify-content: center;\nmargin: 0.8rem 0 0 0;\npadding: 1rem",
-    },
-    ".upload-field": {
-        "comment": "",
-        "props": "align-items: center;\ndisplay: grid;\njustify-content: center",
-    },
-    ".submit-wrapper": {
-        "comment": "",
-        "props": "align-items: center;\ndisplay: flex;\njustify-content: center",
-    },
-    ".button": {
-        "comment": "",
-        "props": "align-items: center;\nborder-radius: 12px;\nborder: 1px solid #787878;\nbox-shadow: transparent 0 0 0 3px, rgba(18, 18, 18, 0.1) 0 6px 20px;\nbox-sizing: border-box;\ncolor: #121412;\ncursor: pointer;\ndisplay: inline-flex;\nfont-family: Inter, sans-serif;\nfont-size: 1rem;\nfont-weight: 500;\njustify-content: center;\nline-height: 1;\nmargin: 0.8rem 0 0 0;\noutline: none;\npadding: 0.8rem 1rem;\ntext-align: center;\ntext-decoration: none;\ntransition: box-shadow 0.2s, -webkit-box-shadow 0.2s;\nuser-select: none;\nwhite-space: nowrap",
-    },
-    ".button:hover": {
-        "comment": "",
-        "props": "box-shadow: #C0C0C0 0 0 0 3px, transparent 0 0 0 0",
-    },
-    ".output-container": {
-        "comment": "",
-        "props": "align-items: center;\ndisplay: flex;\njustify-content: center;\npadding: 2rem",
-    },
-    ".output-wrapper": {"comment": "", "props": "width: 35rem"},
-    ".output-wrapper p": {"comment": "/*TEST COMMENT*/", "props": "text-align: center"},
-}
-
 EXPECTED_FORMATTED_CSS_DICT = {
-    ".banner-container": {
-        "comment": "",
-        "props": [
+    ".banner-container": Entry(
+        comment="",
+        head=".banner-container",
+        kind="class",
+        props=[
             "align-items: center",
             "background: #BEBEBE",
             "display: flex",
             "justify-content: center",
         ],
-    },
-    ".form-container": {
-        "comment": "",
-        "props": ["align-items: center", "display: flex", "justify-content: center"],
-    },
-    ".form-wrapper": {
-        "comment": "",
-        "props": [
+    ),
+    ".form-container": Entry(
+        comment="",
+        head=".form-container",
+        kind="class",
+        props=["align-items: center", "display: flex", "justify-content: center"],
+    ),
+    ".form-wrapper": Entry(
+        comment="",
+        head=".form-wrapper",
+        kind="class",
+        props=[
             "align-items: center",
             "background: linear-gradient(90deg, rgba(218, 226, 218, 1) 26%, rgba(199, 199, 209, 1) 100%, rgba(0, 255, 23, 1) 100%)",
             "background: rgb(218, 226, 218)",
@@ -232,18 +67,24 @@ EXPECTED_FORMATTED_CSS_DICT = {
             "margin: 0.8rem 0 0 0",
             "padding: 1rem",
         ],
-    },
-    ".upload-field": {
-        "comment": "",
-        "props": ["align-items: center", "display: grid", "justify-content: center"],
-    },
-    ".submit-wrapper": {
-        "comment": "",
-        "props": ["align-items: center", "display: flex", "justify-content: center"],
-    },
-    ".button": {
-        "comment": "",
-        "props": [
+    ),
+    ".upload-field": Entry(
+        comment="",
+        head=".upload-field",
+        kind="class",
+        props=["align-items: center", "display: grid", "justify-content: center"],
+    ),
+    ".submit-wrapper": Entry(
+        comment="",
+        head=".submit-wrapper",
+        kind="class",
+        props=["align-items: center", "display: flex", "justify-content: center"],
+    ),
+    ".button": Entry(
+        comment="",
+        head=".button",
+        kind="class",
+        props=[
             "align-items: center",
             "border-radius: 12px",
             "border: 1px solid #787878",
@@ -266,40 +107,55 @@ EXPECTED_FORMATTED_CSS_DICT = {
             "user-select: none",
             "white-space: nowrap",
         ],
-    },
-    ".button:hover": {
-        "comment": "",
-        "props": ["box-shadow: #C0C0C0 0 0 0 3px, transparent 0 0 0 0"],
-    },
-    ".output-container": {
-        "comment": "",
-        "props": [
+    ),
+    ".button:hover": Entry(
+        comment="",
+        head=".button",
+        kind="class",
+        props=["box-shadow: #C0C0C0 0 0 0 3px, transparent 0 0 0 0"],
+    ),
+    ".output-container": Entry(
+        comment="",
+        head=".output-container",
+        kind="class",
+        props=[
             "align-items: center",
             "display: flex",
             "justify-content: center",
             "padding: 2rem",
         ],
-    },
-    ".output-wrapper": {"comment": "", "props": ["width: 35rem"]},
-    ".output-wrapper p": {
-        "comment": "/*TEST COMMENT*/",
-        "props": ["text-align: center"],
-    },
+    ),
+    ".output-wrapper": Entry(
+        comment="",
+        head=".output-wrapper",
+        kind="class",
+        props=["width: 35rem"],
+    ),
+    ".output-wrapper p": Entry(
+        comment="/*TEST COMMENT*/",
+        head=".output-wrapper",
+        kind="class",
+        props=["text-align: center"],
+    ),
 }
 
 EXPECTED_SORTED_CSS_WITHOUT_HTML = {
-    ".banner-container": {
-        "comment": "",
-        "props": [
+    ".banner-container": Entry(
+        comment="",
+        head=".banner-container",
+        kind="class",
+        props=[
             "align-items: center",
             "background: #BEBEBE",
             "display: flex",
             "justify-content: center",
         ],
-    },
-    ".button": {
-        "comment": "",
-        "props": [
+    ),
+    ".button": Entry(
+        comment="",
+        head=".button",
+        kind="class",
+        props=[
             "align-items: center",
             "border-radius: 12px",
             "border: 1px solid #787878",
@@ -322,18 +178,24 @@ EXPECTED_SORTED_CSS_WITHOUT_HTML = {
             "user-select: none",
             "white-space: nowrap",
         ],
-    },
-    ".button:hover": {
-        "comment": "",
-        "props": ["box-shadow: #C0C0C0 0 0 0 3px, transparent 0 0 0 0"],
-    },
-    ".form-container": {
-        "comment": "",
-        "props": ["align-items: center", "display: flex", "justify-content: center"],
-    },
-    ".form-wrapper": {
-        "comment": "",
-        "props": [
+    ),
+    ".button:hover": Entry(
+        comment="",
+        head=".button",
+        kind="class",
+        props=["box-shadow: #C0C0C0 0 0 0 3px, transparent 0 0 0 0"],
+    ),
+    ".form-container": Entry(
+        comment="",
+        head=".form-container",
+        kind="class",
+        props=["align-items: center", "display: flex", "justify-content: center"],
+    ),
+    ".form-wrapper": Entry(
+        comment="",
+        head=".form-wrapper",
+        kind="class",
+        props=[
             "align-items: center",
             "background: linear-gradient(90deg, rgba(218, 226, 218, 1) 26%, rgba(199, 199, 209, 1) 100%, rgba(0, 255, 23, 1) 100%)",
             "background: rgb(218, 226, 218)",
@@ -344,48 +206,67 @@ EXPECTED_SORTED_CSS_WITHOUT_HTML = {
             "margin: 0.8rem 0 0 0",
             "padding: 1rem",
         ],
-    },
-    ".output-container": {
-        "comment": "",
-        "props": [
+    ),
+    ".output-container": Entry(
+        comment="",
+        head=".output-container",
+        kind="class",
+        props=[
             "align-items: center",
             "display: flex",
             "justify-content: center",
             "padding: 2rem",
         ],
-    },
-    ".output-wrapper": {"comment": "", "props": ["width: 35rem"]},
-    ".output-wrapper p": {
-        "comment": "/*TEST COMMENT*/",
-        "props": ["text-align: center"],
-    },
-    ".submit-wrapper": {
-        "comment": "",
-        "props": ["align-items: center", "display: flex", "justify-content: center"],
-    },
-    ".upload-field": {
-        "comment": "",
-        "props": ["align-items: center", "display: grid", "justify-content: center"],
-    },
+    ),
+    ".output-wrapper": Entry(
+        comment="",
+        head=".output-wrapper",
+        kind="class",
+        props=["width: 35rem"],
+    ),
+    ".output-wrapper p": Entry(
+        comment="/*TEST COMMENT*/",
+        head=".output-wrapper",
+        kind="class",
+        props=["text-align: center"],
+    ),
+    ".submit-wrapper": Entry(
+        comment="",
+        head=".submit-wrapper",
+        kind="class",
+        props=["align-items: center", "display: flex", "justify-content: center"],
+    ),
+    ".upload-field": Entry(
+        comment="",
+        head=".upload-field",
+        kind="class",
+        props=["align-items: center", "display: grid", "justify-content: center"],
+    ),
 }
 
 EXPECTED_SORTED_CSS_WITH_HTML = {
-    ".banner-container": {
-        "comment": "",
-        "props": [
+    ".banner-container": Entry(
+        comment="",
+        head=".banner-container",
+        kind="class",
+        props=[
             "align-items: center",
             "background: #BEBEBE",
             "display: flex",
             "justify-content: center",
         ],
-    },
-    ".form-container": {
-        "comment": "",
-        "props": ["align-items: center", "display: flex", "justify-content: center"],
-    },
-    ".form-wrapper": {
-        "comment": "",
-        "props": [
+    ),
+    ".form-container": Entry(
+        comment="",
+        head=".form-container",
+        kind="class",
+        props=["align-items: center", "display: flex", "justify-content: center"],
+    ),
+    ".form-wrapper": Entry(
+        comment="",
+        head=".form-wrapper",
+        kind="class",
+        props=[
             "align-items: center",
             "background: linear-gradient(90deg, rgba(218, 226, 218, 1) 26%, rgba(199, 199, 209, 1) 100%, rgba(0, 255, 23, 1) 100%)",
             "background: rgb(218, 226, 218)",
@@ -396,18 +277,24 @@ EXPECTED_SORTED_CSS_WITH_HTML = {
             "margin: 0.8rem 0 0 0",
             "padding: 1rem",
         ],
-    },
-    ".upload-field": {
-        "comment": "",
-        "props": ["align-items: center", "display: grid", "justify-content: center"],
-    },
-    ".submit-wrapper": {
-        "comment": "",
-        "props": ["align-items: center", "display: flex", "justify-content: center"],
-    },
-    ".button": {
-        "comment": "",
-        "props": [
+    ),
+    ".upload-field": Entry(
+        comment="",
+        head=".upload-field",
+        kind="class",
+        props=["align-items: center", "display: grid", "justify-content: center"],
+    ),
+    ".submit-wrapper": Entry(
+        comment="",
+        head=".submit-wrapper",
+        kind="class",
+        props=["align-items: center", "display: flex", "justify-content: center"],
+    ),
+    ".button": Entry(
+        comment="",
+        head=".button",
+        kind="class",
+        props=[
             "align-items: center",
             "border-radius: 12px",
             "border: 1px solid #787878",
@@ -430,37 +317,50 @@ EXPECTED_SORTED_CSS_WITH_HTML = {
             "user-select: none",
             "white-space: nowrap",
         ],
-    },
-    ".button:hover": {
-        "comment": "",
-        "props": ["box-shadow: #C0C0C0 0 0 0 3px, transparent 0 0 0 0"],
-    },
-    ".output-container": {
-        "comment": "",
-        "props": [
+    ),
+    ".button:hover": Entry(
+        comment="",
+        head=".button",
+        kind="class",
+        props=["box-shadow: #C0C0C0 0 0 0 3px, transparent 0 0 0 0"],
+    ),
+    ".output-container": Entry(
+        comment="",
+        head=".output-container",
+        kind="class",
+        props=[
             "align-items: center",
             "display: flex",
             "justify-content: center",
             "padding: 2rem",
         ],
-    },
-    ".output-wrapper": {"comment": "", "props": ["width: 35rem"]},
-    ".output-wrapper p": {
-        "comment": "/*TEST COMMENT*/",
-        "props": ["text-align: center"],
-    },
+    ),
+    ".output-wrapper": Entry(
+        comment="",
+        head=".output-wrapper",
+        kind="class",
+        props=["width: 35rem"],
+    ),
+    ".output-wrapper p": Entry(
+        comment="/*TEST COMMENT*/",
+        head=".output-wrapper",
+        kind="class",
+        props=["text-align: center"],
+    ),
 }
 
 EXPECTED_SORTED_CSS_WITH_INCOMPLETE_HTML = {
-    ".banner-container": {
-        "comment": "",
-        "props": [
+    ".banner-container": Entry(
+        comment="",
+        head=".banner-container",
+        kind="class",
+        props=[
             "align-items: center",
             "background: #BEBEBE",
             "display: flex",
             "justify-content: center",
         ],
-    }
+    )
 }
 
 
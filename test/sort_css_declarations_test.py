@@ -1,4 +1,6 @@
+import io
 import sys
+import time
 import pytest
 
 sys.path.append("../src/sort_css_declarations")
@@ -6,16 +8,10 @@ sys.path.append("../src/sort_css_declarations")
 import sort_css_declarations
 
 from typing import Generator
-from .expected_output_vars import EXPECTED_HTML_DICT 
-from .expected_output_vars import EXPECTED_INCOMPLETE_HTML_DICT 
-
-from .expected_output_vars import EXPECTED_HTML_ELEMS_ORDER 
-from .expected_output_vars import EXPECTED_INCOMPLETE_HTML_ELEMS_ORDER
 
 from .expected_output_vars import EXPECTED_ORDERED_HTML_ELEMS
 from .expected_output_vars import EXPECTED_ORDERED_INCOMPLETE_HTML_ELEMS # HERE
-
-from .expected_output_vars import EXPECTED_CSS_DICT 
+from .expected_output_vars import EXPECTED_ORDERED_BODY_ATTRS_HTML_ELEMS
 
 from .expected_output_vars import EXPECTED_FORMATTED_CSS_DICT
 
@@ -29,6 +25,8 @@ from .expected_output_vars import EXPECTED_OUTPUT_WITH_HTML
 TEST_CSS_PATH = "./test_data/test_css.css"
 TEST_HTML_PATH = "./test_data/test_html.html"
 TEST_INCOMPLETE_HTML_PATH = "./test_data/test_incomplete_html.html"
+TEST_BODY_ATTRS_HTML_PATH = "./test_data/test_body_attrs_html.html"
+TEST_EMPTY_HTML_PATH = "./test_data/test_empty_html.html"
 
 
 def test_read_file():
@@ -36,41 +34,46 @@ def test_read_file():
     assert isinstance(data, str)
 
 
-def test_parse():
-
-    with open(TEST_HTML_PATH, 'r', encoding='UTF-8') as file:
-        html_str = file.read()
-
-    test_output_dict = sort_css_declarations._parse(html_str)
+def test_read_bytes():
+    data = sort_css_declarations.read_bytes(TEST_CSS_PATH)
+    assert isinstance(data, bytes)
 
-    assert test_output_dict == EXPECTED_HTML_DICT 
-
-
-def test_convert_html_to_dict():
-    test_output_dict = sort_css_declarations.convert_html_to_dict(TEST_HTML_PATH)
-    
-    assert test_output_dict == EXPECTED_HTML_DICT
 
 @pytest.mark.parametrize(
     ('input_x', 'expected'),
     (
-        pytest.param(EXPECTED_HTML_DICT['html'], EXPECTED_HTML_ELEMS_ORDER, id='with full-fetched html'),
-        pytest.param(EXPECTED_INCOMPLETE_HTML_DICT, EXPECTED_INCOMPLETE_HTML_ELEMS_ORDER, id="with incomplete html")
+        pytest.param(TEST_HTML_PATH, EXPECTED_ORDERED_HTML_ELEMS, id='with full-fetched html'),
+        pytest.param(TEST_INCOMPLETE_HTML_PATH, EXPECTED_ORDERED_INCOMPLETE_HTML_ELEMS, id="with incomplete html"),
+        pytest.param(TEST_BODY_ATTRS_HTML_PATH, EXPECTED_ORDERED_BODY_ATTRS_HTML_ELEMS, id="with attributed body"),
+        pytest.param(TEST_EMPTY_HTML_PATH, (), id="with empty html"),
 
     )
 )
-def test_get_identifiers_in_order(input_x, expected):
-    test_output_generator_complete = sort_css_declarations.get_identifiers_in_order(input_x)
+def test_iter_identifiers(input_x, expected):
+    test_output_generator = sort_css_declarations.iter_identifiers(input_x)
 
-    assert isinstance(test_output_generator_complete, Generator)
-    assert tuple(test_output_generator_complete) == expected
+    assert isinstance(test_output_generator, Generator)
+    assert tuple(dict.fromkeys(test_output_generator)) == expected
+
+
+def test_iter_identifiers_deeply_nested(tmp_path):
+    depth = 1000
+
+    html_path = tmp_path / "nested.html"
+    html_path.write_text("<div>" * depth + '<p class="leaf"></p>' + "</div>" * depth)
+
+    test_output = tuple(sort_css_declarations.iter_identifiers(str(html_path)))
+
+    assert test_output == ("div",) * depth + ("p", ".leaf")
 
 
 @pytest.mark.parametrize(
     ('input_x', 'expected'),
     (
         pytest.param(TEST_HTML_PATH, EXPECTED_ORDERED_HTML_ELEMS, id='with full-fetched html'),
-        pytest.param(TEST_INCOMPLETE_HTML_PATH, EXPECTED_ORDERED_INCOMPLETE_HTML_ELEMS, id="with incomplete html")
+        pytest.param(TEST_INCOMPLETE_HTML_PATH, EXPECTED_ORDERED_INCOMPLETE_HTML_ELEMS, id="with incomplete html"),
+        pytest.param(TEST_BODY_ATTRS_HTML_PATH, EXPECTED_ORDERED_BODY_ATTRS_HTML_ELEMS, id="with attributed body"),
+        pytest.param(TEST_EMPTY_HTML_PATH, (), id="with empty html"),
 
     )
 )
@@ -89,12 +92,153 @@ def test_css_to_dict():
 
         test_output_dict = sort_css_declarations.css_to_dict(css_content)
 
-        assert test_output_dict == EXPECTED_CSS_DICT
+        assert test_output_dict == EXPECTED_FORMATTED_CSS_DICT
 
 
-def test_format_css_dict():
-    test_output_dict = sort_css_declarations.format_css_dict(EXPECTED_CSS_DICT)
-    assert test_output_dict == EXPECTED_FORMATTED_CSS_DICT
+@pytest.mark.parametrize(
+    ('input_x', 'expected'),
+    (
+        pytest.param('p { content: "é"; }'.encode('UTF-8'), 'content: "é"', id='without charset'),
+        pytest.param('@charset "ISO-8859-1";\np { content: "é"; }'.encode('latin-1'), 'content: "é"', id="with charset")
+    )
+)
+def test_css_to_dict_from_bytes(input_x, expected):
+    test_output_dict = sort_css_declarations.css_to_dict(input_x)
+    assert test_output_dict["p"].props == [expected]
+
+
+def test_css_to_dict_with_at_rules():
+
+    css_content = """@import url('fonts.css?family=PT+Serif:wght@400;700');
+    /*MEDIA COMMENT*/
+    @media screen and (max-width: 450px) { html { font-size: 12px; } }
+    a, p {
+        color : red ;;
+        margin:  0
+            1rem;
+    }
+    """
+
+    test_output_dict = sort_css_declarations.css_to_dict(css_content)
+
+    assert test_output_dict == {
+        "/*IMPORTS*/": sort_css_declarations.Entry(
+            head="/*IMPORTS*/",
+            kind="import",
+            props=["@import url('fonts.css?family=PT+Serif:wght@400;700')"],
+        ),
+        "a": sort_css_declarations.Entry(
+            comment="/*MEDIA COMMENT*/",
+            head="a",
+            props=["color: red", "margin: 0 1rem"],
+        ),
+        "p": sort_css_declarations.Entry(
+            comment="/*MEDIA COMMENT*/",
+            head="p",
+            props=["color: red", "margin: 0 1rem"],
+        ),
+    }
+
+
+def test_css_to_dict_with_unclosed_parentheses():
+
+    css_content = "p { content: " + "(" * 200_000 + "; }"
+
+    start = time.perf_counter()
+    test_output_dict = sort_css_declarations.css_to_dict(css_content)
+
+    # A backtracking pattern takes seconds on this, a linear one milliseconds.
+    assert time.perf_counter() - start < 1
+    assert test_output_dict["p"].props == ["content: " + "(" * 200_000 + ";"]
+
+
+def test_css_to_dict_with_repeated_selectors():
+
+    css_content = "a { color: red; } a, p { margin: 0; } a { color: blue; }"
+
+    test_output_dict = sort_css_declarations.css_to_dict(css_content)
+
+    assert test_output_dict == {
+        "a": sort_css_declarations.Entry(head="a", props=["color: blue", "margin: 0"]),
+        "p": sort_css_declarations.Entry(head="p", props=["margin: 0"]),
+    }
+
+
+def test_css_to_dict_passes_through_at_rules():
+
+    css_content = """@namespace svg url(http://www.w3.org/2000/svg);
+    /*FONTS*/
+    @font-face { font-family: Inter; src: url(inter.woff2); }
+    @keyframes spin { from { rotate: 0deg; } to { rotate: 360deg; } }
+    p { color: red; }
+    """
+
+    test_output_dict = sort_css_declarations.css_to_dict(css_content)
+
+    assert test_output_dict == {
+        "@namespace svg url(http://www.w3.org/2000/svg);": sort_css_declarations.Entry(
+            head="@namespace", kind="at-rule"
+        ),
+        "@font-face { font-family: Inter; src: url(inter.woff2); }": sort_css_declarations.Entry(
+            comment="/*FONTS*/", head="@font-face", kind="at-rule"
+        ),
+        "@keyframes spin { from { rotate: 0deg; } to { rotate: 360deg; } }": sort_css_declarations.Entry(
+            head="@keyframes", kind="at-rule"
+        ),
+        "p": sort_css_declarations.Entry(head="p", props=["color: red"]),
+    }
+
+
+def test_media_rules_to_dict():
+
+    css_content = """a { color: red; }
+    @media screen and (max-width: 450px) {
+        html { font-size: 12px; }
+
+        /*TESTYTEST*/
+        .main-header { gap: 15px; flex-flow: column; }
+    }
+    """
+
+    test_output_dict = sort_css_declarations.media_rules_to_dict(css_content)
+
+    assert test_output_dict == {
+        "@media screen and (max-width: 450px)": [
+            {"css_selector": "html", "comment": "", "props": ["font-size: 12px"], "kind": "tag"},
+            {
+                "css_selector": ".main-header",
+                "comment": "/*TESTYTEST*/",
+                "props": ["flex-flow: column", "gap: 15px"],
+                "kind": "class",
+            },
+        ]
+    }
+
+
+def test_media_rules_to_dict_passes_through_at_rules():
+
+    css_content = "@media (min-width:1px){ @supports (display:grid){ p{z-index:1;color:red} } }"
+
+    test_output_dict = sort_css_declarations.media_rules_to_dict(css_content)
+
+    assert test_output_dict == {
+        "@media (min-width:1px)": [
+            {
+                "css_selector": "@supports (display:grid) { p{z-index:1;color:red} }",
+                "comment": "",
+                "props": [],
+                "kind": "at-rule",
+            },
+        ]
+    }
+
+    output = io.StringIO()
+    sort_css_declarations.write_css({}, test_output_dict, output)
+    assert output.getvalue() == (
+        "\n@media (min-width:1px) {\n"
+        "    @supports (display:grid) { p{z-index:1;color:red} }\n"
+        "}\n"
+    )
 
 
 def test_sort_css_by_keys():
@@ -117,3 +261,10 @@ def test_sort_css_by_html(input_x, expected):
 def test_generate_output_str():
     test_output_str = sort_css_declarations.generate_output_str(EXPECTED_SORTED_CSS_WITHOUT_HTML, {})
     assert test_output_str == EXPECTED_OUTPUT_WITHOUT_HTML
+
+
+def test_write_css():
+    output = io.StringIO()
+    sort_css_declarations.write_css(EXPECTED_SORTED_CSS_WITHOUT_HTML, {}, output)
+    assert output.getvalue() == EXPECTED_OUTPUT_WITHOUT_HTML
+